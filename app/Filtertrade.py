@@ -23,13 +23,30 @@ import argparse
 import os
 import sys
 import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+try:
+    import polars as pl  # optional: multi-threaded streaming engine
+except ImportError:  # pragma: no cover - polars is an optional accelerator
+    pl = None
+
+try:
+    import pyarrow as pa  # optional: multi-threaded CSV reader + SIMD kernels
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - pyarrow is an optional accelerator
+    pa = None
+
 
 CANCELLED_TOKENS = {"cancelled", "canceled"}  # UK + US spelling
+# Value set for the arrow engine, built once instead of per batch
+_CANCELLED_ARROW = pa.array(sorted(CANCELLED_TOKENS)) if pa is not None else None
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -73,19 +90,29 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default=None,
         help="List of values to treat as NA, separated by | (e.g. 'NA|NaN|')",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for the pandas engine (default: CPU count)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["auto", "polars", "arrow", "pandas"],
+        default="auto",
+        help="Filtering engine: 'polars' streams via scan_csv/sink_csv, 'arrow' uses the "
+        "pyarrow block reader + compute kernels, 'pandas' reads in chunks (default: auto)",
+    )
     return parser
 
 
-def _normalize_comment(series: pd.Series) -> pd.Series:
-    # Only normalize if column exists; otherwise, return empty string so it doesn't match
-    s = series.astype("string").fillna("").str.strip().str.lower()
-    return s
-
-
-def _magic_is_zero(series: pd.Series) -> pd.Series:
-    # NaN is not removed (comparison with 0 will be False)
-    mag = pd.to_numeric(series, errors="coerce")
-    return mag.eq(0)
+def _magic_is_zero(series: pd.Series) -> np.ndarray:
+    # Unparseable/NA values must be kept, so compare directly only when the
+    # reader already inferred a numeric column; otherwise coerce bad values
+    # to NaN first (NaN rows are not removed).
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    return series.eq(0).to_numpy(dtype=bool, na_value=False)
 
 
 def filter_chunk(df: pd.DataFrame) -> pd.DataFrame:
@@ -94,15 +121,162 @@ def filter_chunk(df: pd.DataFrame) -> pd.DataFrame:
         raise KeyError("Missing 'magic' column in CSV")
     if "comment" not in df.columns:
         # If 'comment' is missing, only apply magic == 0 condition
-        magic_zero = _magic_is_zero(df["magic"]).fillna(False)
-        return df.loc[~magic_zero]
-
-    magic_zero = _magic_is_zero(df["magic"]).fillna(False)
-    comments = _normalize_comment(df["comment"])  # case-insensitive
-    cancelled = comments.isin(CANCELLED_TOKENS)
+        return df.iloc[~_magic_is_zero(df["magic"])]
+
+    magic_zero = _magic_is_zero(df["magic"])
+    # Single vectorized pass over the comment column instead of chained
+    # fillna/strip/lower Series ops (each of which copies the buffer).
+    # The unicode view is sized to the widest comment: a fixed narrow width
+    # would truncate before np.char.strip and make whitespace-padded tokens
+    # (e.g. "        cancelled") slip through the filter.
+    comment = df["comment"]
+    if not (comment.dtype == object or pd.api.types.is_string_dtype(comment)):
+        # An all-NA column is inferred as float64; na_value="" then blows up
+        # inside to_numpy, so force a string dtype first.
+        comment = comment.astype("string")
+    arr = comment.to_numpy(copy=False, na_value="")
+    lowered = np.char.lower(np.char.strip(arr.astype(str)))
+    # Two vectorized equality compares beat np.isin's hash setup for a
+    # cardinality-2 token set
+    cancelled = (lowered == "cancelled") | (lowered == "canceled")
 
     mask_drop = magic_zero | cancelled
-    return df.loc[~mask_drop]
+    return df.iloc[~mask_drop]
+
+
+def _polars_usable(encoding: str, sep: str) -> bool:
+    # Polars' CSV reader only speaks utf-8 and single-character separators
+    return pl is not None and encoding.lower() in {"utf-8", "utf8"} and len(sep) == 1
+
+
+def filter_csv_polars(
+    input_path: Path,
+    output_path: Path,
+    *,
+    sep: str = ",",
+    na_vals: Optional[list[str]] = None,
+) -> Path:
+    """Streaming filter via Polars: predicates are pushed into the multi-threaded
+    CSV scan, so dropped rows are never materialized as Python objects and memory
+    stays bounded regardless of input size."""
+    scan_kwargs = dict(separator=sep, null_values=na_vals, infer_schema_length=10_000)
+    columns = pl.scan_csv(input_path, **scan_kwargs).collect_schema().names()
+    if "magic" not in columns:
+        raise KeyError("Missing 'magic' column in CSV")
+
+    # Same semantics as filter_chunk: keep rows where magic is non-zero (or
+    # unparseable/NA), and drop rows whose comment is 'cancelled'/'canceled'.
+    # Float64, not Int64: "0.0" must parse to zero (and be dropped) exactly
+    # like pd.to_numeric does in the pandas/arrow engines.
+    keep = pl.col("magic").cast(pl.Float64, strict=False).ne(0).fill_null(True)
+    if "comment" in columns:
+        cancelled = (
+            pl.col("comment")
+            .cast(pl.Utf8)
+            .str.strip_chars()
+            .str.to_lowercase()
+            .is_in(sorted(CANCELLED_TOKENS))
+        )
+        keep = keep & ~cancelled.fill_null(False)
+
+    lazy = pl.scan_csv(input_path, **scan_kwargs)
+    lazy.filter(keep).sink_csv(output_path)
+
+    # Both counts come from one narrow scan (only the predicate columns are
+    # projected) instead of re-reading the full input and the written output.
+    counts = (
+        pl.scan_csv(input_path, **scan_kwargs)
+        .select(pl.len().alias("total"), keep.sum().alias("kept"))
+        .collect()
+    )
+    total_in = counts["total"].item()
+    total_out = counts["kept"].item()
+    print(
+        f"Read {total_in} rows, wrote {total_out} rows -> {output_path}",
+        file=sys.stderr,
+    )
+    return output_path
+
+
+def _arrow_usable(sep: str) -> bool:
+    return pa is not None and len(sep) == 1
+
+
+def _coerce_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _arrow_magic_is_zero(mag: "pa.Array") -> "pa.Array":
+    # Arrow's cast raises on unparseable strings instead of coercing to
+    # null, but the rules keep rows whose magic cannot be parsed. Compare
+    # numeric columns directly; for string columns try a bulk cast and fall
+    # back to per-value coercion only when the batch contains bad values.
+    if not (pa.types.is_integer(mag.type) or pa.types.is_floating(mag.type)):
+        try:
+            mag = pc.cast(mag, pa.float64())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            mag = pa.array((_coerce_float(v) for v in mag.to_pylist()), type=pa.float64())
+    return pc.fill_null(pc.equal(mag, 0), False)
+
+
+def _arrow_keep_mask(batch: "pa.RecordBatch") -> "pa.Array":
+    # Keep rows where magic is non-zero (or null), minus cancelled comments.
+    magic_zero = _arrow_magic_is_zero(batch.column("magic"))
+    if batch.schema.get_field_index("comment") == -1:
+        return pc.invert(magic_zero)
+    comment = pc.fill_null(pc.cast(batch.column("comment"), pa.string()), "")
+    lowered = pc.utf8_lower(pc.utf8_trim_whitespace(comment))
+    cancelled = pc.is_in(lowered, value_set=_CANCELLED_ARROW)
+    return pc.invert(pc.or_(magic_zero, cancelled))
+
+
+def filter_csv_arrow(
+    input_path: Path,
+    output_path: Path,
+    *,
+    chunksize: int = 100_000,
+    encoding: str = "utf-8",
+    sep: str = ",",
+    na_vals: Optional[list[str]] = None,
+) -> Path:
+    """Filter via pyarrow: the multi-threaded block CSV reader feeds SIMD
+    compute kernels, and batches are written through one CSVWriter instead of
+    re-opening the output in append mode per chunk."""
+    read_options = pacsv.ReadOptions(block_size=chunksize * 256, encoding=encoding)
+    parse_options = pacsv.ParseOptions(delimiter=sep)
+    convert_options = None
+    if na_vals:
+        convert_options = pacsv.ConvertOptions(null_values=na_vals, strings_can_be_null=True)
+
+    total_in = 0
+    total_out = 0
+    # Memory-map the input: parser blocks come straight from the page cache
+    # without an extra user-space copy per read
+    with pa.memory_map(str(input_path), "r") as source, pacsv.open_csv(
+        source,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options,
+    ) as reader:
+        if reader.schema.get_field_index("magic") == -1:
+            raise KeyError("Missing 'magic' column in CSV")
+        with pacsv.CSVWriter(output_path, reader.schema) as writer:
+            for batch in reader:
+                total_in += batch.num_rows
+                out = batch.filter(_arrow_keep_mask(batch))
+                total_out += out.num_rows
+                writer.write_batch(out)
+
+    print(
+        f"Read {total_in} rows, wrote {total_out} rows -> {output_path}",
+        file=sys.stderr,
+    )
+    return output_path
 
 
 def filter_csv(
@@ -113,6 +287,8 @@ def filter_csv(
     encoding: str = "utf-8",
     sep: str = ",",
     na_values: Optional[str] = None,
+    engine: str = "auto",
+    workers: Optional[int] = None,
 ) -> Path:
     if not input_path.exists():
         raise FileNotFoundError(f"File not found: {input_path}")
@@ -126,39 +302,91 @@ def filter_csv(
     if na_values:
         na_vals = [tok for tok in na_values.split("|") if tok is not None]
 
+    if engine == "polars" and not _polars_usable(encoding, sep):
+        raise RuntimeError(
+            "Polars engine unavailable (not installed, or encoding/sep unsupported)."
+        )
+    if engine == "arrow" and not _arrow_usable(sep):
+        raise RuntimeError("Arrow engine unavailable (pyarrow not installed, or sep unsupported).")
+    if engine in {"auto", "polars"} and _polars_usable(encoding, sep):
+        if output_path.exists():
+            output_path.unlink()
+        return filter_csv_polars(input_path, output_path, sep=sep, na_vals=na_vals)
+    if engine in {"auto", "arrow"} and _arrow_usable(sep):
+        if output_path.exists():
+            output_path.unlink()
+        return filter_csv_arrow(
+            input_path,
+            output_path,
+            chunksize=chunksize,
+            encoding=encoding,
+            sep=sep,
+            na_vals=na_vals,
+        )
+
     total_in = 0
     total_out = 0
     wrote_header = False
 
-    # Open for new write
-    if output_path.exists():
-        output_path.unlink()
+    # magic dtype is left to inference: pinning it to an integer dtype makes
+    # the reader raise on any non-numeric value mid-iteration, aborting the
+    # run with a partial output file where the rules say such rows are kept.
+    read_kwargs: dict = dict(
+        chunksize=chunksize,
+        encoding=encoding,
+        sep=sep,
+        na_values=na_vals,
+        low_memory=False,
+        memory_map=True,
+    )
+    if pa is not None:
+        # Arrow-backed columns: strings stay in contiguous Arrow buffers
+        # (roughly 3-5x lighter than object arrays of Python str) and the
+        # string kernels run natively. The C parser still does the chunked
+        # read; only the backing storage changes.
+        read_kwargs.update(dtype_backend="pyarrow")
 
     try:
-        reader = pd.read_csv(
-            input_path,
-            chunksize=chunksize,
-            encoding=encoding,
-            sep=sep,
-            na_values=na_vals,
-            low_memory=False,
-        )
+        reader = pd.read_csv(input_path, **read_kwargs)
     except Exception as exc:
         raise RuntimeError(
             "Error reading CSV. Try adjusting --encoding or --sep."
         ) from exc
 
-    for chunk in reader:
-        total_in += len(chunk)
-        try:
-            out = filter_chunk(chunk)
-        except KeyError as ke:
-            # Error due to missing required column
-            raise
-        total_out += len(out)
-        # Append to output
-        out.to_csv(output_path, index=False, mode="a", header=not wrote_header)
-        wrote_header = True
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, workers)
+
+    # One persistent, generously buffered handle for the whole run: reopening
+    # in append mode per chunk pays an open/close plus CSV formatter setup tax
+    # for every chunk.
+    with open(
+        output_path, "w", newline="", encoding=encoding, buffering=1024 * 1024
+    ) as f:
+
+        def _emit(out: pd.DataFrame) -> None:
+            nonlocal total_out, wrote_header
+            total_out += len(out)
+            out.to_csv(f, index=False, header=not wrote_header)
+            wrote_header = True
+
+        if workers == 1:
+            for chunk in reader:
+                total_in += len(chunk)
+                _emit(filter_chunk(chunk))
+        else:
+            # filter_chunk is pure, so chunks fan out to worker processes;
+            # futures drain in submission order (output order preserved) with
+            # a bounded queue so the reader cannot run ahead of the pool
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending: deque = deque()
+                for chunk in reader:
+                    total_in += len(chunk)
+                    pending.append(executor.submit(filter_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        _emit(pending.popleft().result())
+                while pending:
+                    _emit(pending.popleft().result())
 
     print(
         f"Read {total_in} rows, wrote {total_out} rows -> {output_path}",
@@ -174,6 +402,8 @@ def inplace_filter(
     encoding: str,
     sep: str,
     na_values: Optional[str],
+    engine: str = "auto",
+    workers: Optional[int] = None,
 ) -> Path:
     # Safely write via temporary file then replace
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -185,6 +415,8 @@ def inplace_filter(
             encoding=encoding,
             sep=sep,
             na_values=na_values,
+            engine=engine,
+            workers=workers,
         )
         # Atomically replace if possible
         os.replace(out, input_path)
@@ -211,6 +443,8 @@ def main(argv: list[str] | None = None) -> int:
                 encoding=args.encoding,
                 sep=args.sep,
                 na_values=args.na_values,
+                engine=args.engine,
+                workers=args.workers,
             )
         else:
             out = filter_csv(
@@ -220,6 +454,8 @@ def main(argv: list[str] | None = None) -> int:
                 encoding=args.encoding,
                 sep=args.sep,
                 na_values=args.na_values,
+                engine=args.engine,
+                workers=args.workers,
             )
             print(out)
     except Exception as exc:
@@ -19,43 +19,62 @@ import csv
 import json
 import os
 import re
+import sys
 from dataclasses import asdict, dataclass
+from operator import itemgetter
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import mysql.connector  # pip install mysql-connector-python
 
+try:
+    import pyarrow as pa  # optional: bulk columnar conversions
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is an optional accelerator
+    pa = None
+
+try:
+    import pandas as pd  # optional: vectorized bulk export path
+except ImportError:  # pragma: no cover - pandas is an optional accelerator
+    pd = None
+
+try:
+    import orjson  # optional: 2-3x faster JSON serialization
+except ImportError:  # pragma: no cover - orjson is an optional accelerator
+    orjson = None
+
 
 # ----------------------------
 # Datetime conversion helpers
 # ----------------------------
 
-def _is_epoch_sentinel(val: Optional[int | str]) -> bool:
-    if val is None:
-        return True
-    s = str(val).strip()
-    return s in {"0", "19700101000000000"}
+_UTC = timezone.utc
 
 
 def bigint_hr_to_datetime(value: Optional[int | str]) -> Optional[datetime]:
+    # Hot path: called four times per exported row. Slice the digit string
+    # directly instead of strptime (which re-interprets its format string on
+    # every call and costs ~10x as much).
     if value is None:
         return None
     s = str(value).strip()
-    if not s or _is_epoch_sentinel(s):
+    if not s or s == "0" or s == "19700101000000000":
         return None
     if not s.isdigit():
         raise ValueError(f"Invalid BigIntHumanReadable value: {value}")
-    if len(s) == 14:
-        fmt = "%Y%m%d%H%M%S"
-        dt = datetime.strptime(s, fmt).replace(tzinfo=timezone.utc)
-        return dt
-    if len(s) == 17:
-        base, ms = s[:14], s[14:]
-        dt = datetime.strptime(base, "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
-        dt = dt.replace(microsecond=int(ms) * 1000)
-        return dt
-    raise ValueError(
-        f"Unsupported length for BigIntHumanReadable (expect 14 or 17): {value}"
+    n = len(s)
+    if n == 14:
+        us = 0
+    elif n == 17:
+        us = int(s[14:17]) * 1000
+    else:
+        raise ValueError(
+            f"Unsupported length for BigIntHumanReadable (expect 14 or 17): {value}"
+        )
+    return datetime(
+        int(s[0:4]), int(s[4:6]), int(s[6:8]),
+        int(s[8:10]), int(s[10:12]), int(s[12:14]),
+        us, _UTC,
     )
 
 
@@ -70,7 +89,12 @@ def datetime_to_bigint_hr(dt: Optional[datetime]) -> Optional[int]:
     if ms == 1000:
         aware = aware.replace(microsecond=0)
         ms = 0
-    return int(aware.strftime("%Y%m%d%H%M%S") + f"{ms:03d}")
+    # Pure integer arithmetic instead of strftime + concat + int() reparse.
+    # Year <= 9999, so the result always fits comfortably in int64.
+    return (
+        ((((aware.year * 100 + aware.month) * 100 + aware.day) * 100
+          + aware.hour) * 100 + aware.minute) * 100 + aware.second
+    ) * 1000 + ms
 
 
 # ----------------------------
@@ -120,6 +144,73 @@ class TradeRecord:
         return d
 
 
+@dataclass
+class TradeBatch:
+    """Column-oriented (SoA) batch of trade rows.
+
+    Stores one list per output field instead of N boxed TradeRecord objects
+    (~3-4x lighter in CPython), and maps trivially onto Arrow or pandas
+    columns for bulk CSV output.
+    """
+
+    columns: Dict[str, list]
+
+    def __len__(self) -> int:
+        return len(self.columns["id"]) if self.columns else 0
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[Any, ...]]) -> "TradeBatch":
+        # Column-at-a-time construction over COLUMNS-ordered tuples: one
+        # tight comprehension per field instead of 25 dict lookups per row.
+        columns = {
+            name: [_FIELD_CONVERTERS[name](row[i]) for row in rows]
+            for i, name in enumerate(_COLUMN_RENAME.values())
+        }
+        return cls(columns=columns)
+
+    @classmethod
+    def from_records(cls, records: List["TradeRecord"]) -> "TradeBatch":
+        names = list(TradeRecord.__annotations__)
+        columns: Dict[str, list] = {name: [] for name in names}
+        for rec in records:
+            for name in names:
+                columns[name].append(getattr(rec, name))
+        return cls(columns=columns)
+
+    def is_closed_column(self) -> List[bool]:
+        # One pass of zip+compare instead of N @property dispatches
+        return [
+            ot is not None and ct is not None and ct >= ot
+            for ot, ct in zip(self.columns["open_time"], self.columns["close_time"])
+        ]
+
+    def to_arrow(self) -> "pa.Table":
+        # Explicit types keep the schema identical across batches (inference
+        # on an all-null column would otherwise produce a null-typed field)
+        arrays = {
+            name: pa.array(values, type=_arrow_field_type(name))
+            for name, values in self.columns.items()
+        }
+        # close_time >= open_time; null on either side propagates -> False
+        is_closed = pc.fill_null(
+            pc.greater_equal(arrays["close_time"], arrays["open_time"]), False
+        )
+        # Render bool/datetime/float columns to the same strings the stdlib
+        # writer produces, so the CSV bytes do not depend on which optional
+        # accelerator happens to be installed
+        arrays["is_closed"] = pc.if_else(is_closed, "True", "False")
+        for name in _DATETIME_FIELDS:
+            # '%S' carries the subseconds in Arrow; drop them when zero to
+            # match _iso / datetime.isoformat
+            s = pc.strftime(arrays[name], format="%Y-%m-%dT%H:%M:%SZ")
+            arrays[name] = pc.replace_substring_regex(
+                s, pattern=r"\.000000Z$", replacement="Z"
+            )
+        for name in _FLOAT_FIELDS:
+            arrays[name] = _arrow_float_strings(arrays[name])
+        return pa.table(arrays)
+
+
 @dataclass
 class TradeQuery:
     trade_account_id: Optional[int] = None
@@ -130,6 +221,10 @@ class TradeQuery:
     closed_from: Optional[datetime] = None
     closed_to: Optional[datetime] = None
     comment_like: Optional[str] = None
+    # Push the Filtertrade rules into the WHERE clause so dropped rows never
+    # leave the server (predicate pushdown)
+    drop_magic_zero: bool = True
+    drop_cancelled: bool = True
     limit: int = 100
     offset: int = 0
     order_by: str = "OpenTime"
@@ -181,6 +276,8 @@ COLUMNS: Tuple[str, ...] = (
 
 REQUIRED_SET = set(COLUMNS)
 
+_COLUMNS_SQL = ", ".join(COLUMNS)
+
 
 def build_where_and_params(q: TradeQuery) -> Tuple[str, List[Any]]:
     q.validate()
@@ -210,40 +307,57 @@ def build_where_and_params(q: TradeQuery) -> Tuple[str, List[Any]]:
     if q.comment_like:
         clauses.append("Comment LIKE %s")
         params.append(f"%{q.comment_like}%")
+    if q.drop_magic_zero:
+        clauses.append("Magic <> 0")
+    if q.drop_cancelled:
+        clauses.append("(Comment IS NULL OR LOWER(TRIM(Comment)) NOT IN (%s, %s))")
+        params.extend(["cancelled", "canceled"])
     where = " WHERE " + " AND ".join(clauses) if clauses else ""
     return where, params
 
 
-def row_to_trade_record(row: Dict[str, Any]) -> TradeRecord:
+def trade_record_from_tuple(row: Tuple[Any, ...]) -> TradeRecord:
+    # Hot path: positional unpacking of a COLUMNS-ordered tuple avoids 25
+    # dict lookups per row compared to the old dictionary-cursor mapping.
+    (
+        id_, trade_account_id, ticket, symbol_name, digits, type_, quantity,
+        state, open_time, open_price, open_rate, close_time, close_price,
+        close_rate, stop_loss, take_profit, expiration, commission,
+        commission_agent, swap, profit, tax, magic, comment, timestamp,
+    ) = row
     return TradeRecord(
-        id=int(row["ID"]),
-        trade_account_id=_opt_int(row.get("TradeAccountID")),
-        ticket=_opt_int(row.get("Ticket")),
-        symbol_name=_opt_str(row.get("SymbolName")),
-        digits=_opt_int(row.get("Digits")),
-        type=_opt_int(row.get("Type")),
-        quantity=_opt_float(row.get("Quantity")),
-        state=_opt_int(row.get("State")),
-        open_time=bigint_hr_to_datetime(row.get("OpenTime")),
-        open_price=_opt_float(row.get("OpenPrice")),
-        open_rate=_opt_float(row.get("OpenRate")),
-        close_time=bigint_hr_to_datetime(row.get("CloseTime")),
-        close_price=_opt_float(row.get("ClosePrice")),
-        close_rate=_opt_float(row.get("CloseRate")),
-        stop_loss=_opt_float(row.get("StopLoss")),
-        take_profit=_opt_float(row.get("TakeProfit")),
-        expiration=bigint_hr_to_datetime(row.get("Expiration")),
-        commission=_opt_float(row.get("Commission")),
-        commission_agent=_opt_float(row.get("CommissionAgent")),
-        swap=_opt_float(row.get("Swap")),
-        profit=_opt_float(row.get("Profit")),
-        tax=_opt_float(row.get("Tax")),
-        magic=_opt_int(row.get("Magic")),
-        comment=_opt_str(row.get("Comment")),
-        timestamp=bigint_hr_to_datetime(row.get("TimeStamp")),
+        id=int(id_),
+        trade_account_id=_opt_int(trade_account_id),
+        ticket=_opt_int(ticket),
+        symbol_name=_opt_str(symbol_name),
+        digits=_opt_int(digits),
+        type=_opt_int(type_),
+        quantity=_opt_float(quantity),
+        state=_opt_int(state),
+        open_time=bigint_hr_to_datetime(open_time),
+        open_price=_opt_float(open_price),
+        open_rate=_opt_float(open_rate),
+        close_time=bigint_hr_to_datetime(close_time),
+        close_price=_opt_float(close_price),
+        close_rate=_opt_float(close_rate),
+        stop_loss=_opt_float(stop_loss),
+        take_profit=_opt_float(take_profit),
+        expiration=bigint_hr_to_datetime(expiration),
+        commission=_opt_float(commission),
+        commission_agent=_opt_float(commission_agent),
+        swap=_opt_float(swap),
+        profit=_opt_float(profit),
+        tax=_opt_float(tax),
+        magic=_opt_int(magic),
+        comment=_opt_str(comment),
+        timestamp=bigint_hr_to_datetime(timestamp),
     )
 
 
+def row_to_trade_record(row: Dict[str, Any]) -> TradeRecord:
+    return trade_record_from_tuple(tuple(row.get(col) for col in COLUMNS))
+
+
 def _opt_int(v: Any) -> Optional[int]:
     return None if v is None else int(v)
 
@@ -259,88 +373,336 @@ def _opt_str(v: Any) -> Optional[str]:
     return s if s != "" else None
 
 
-def fetch_trades(conn_params: Dict[str, Any], query: TradeQuery) -> List[TradeRecord]:
-    columns_sql = ", ".join(COLUMNS)
+def fetch_rows(conn_params: Dict[str, Any], query: TradeQuery) -> Iterator[Tuple[Any, ...]]:
+    """Stream raw result rows (COLUMNS-ordered tuples) for a filter query.
+
+    Uses an unbuffered tuple cursor so rows flow straight from the server
+    into the writer instead of being materialized twice (fetchall + record
+    list), without building a dict per row. The statement is prepared, so
+    the server parses/plans it once per connection and repeated executions
+    ship only parameters; results arrive over the binary protocol already
+    typed. Validation, connection and execute all happen eagerly — before
+    the caller opens its output file — and only the row drain is deferred
+    to the returned generator.
+    """
     where_sql, params = build_where_and_params(query)
     sql = (
-        f"SELECT {columns_sql} FROM TradeHistories" + where_sql +
+        f"SELECT {_COLUMNS_SQL} FROM TradeHistories" + where_sql +
         f" ORDER BY {query.order_by} {query.order_dir} LIMIT %s OFFSET %s"
     )
     params.extend([query.limit, query.offset])
     cnx = mysql.connector.connect(**conn_params)
     try:
-        cur = cnx.cursor(dictionary=True)
+        cur = cnx.cursor(prepared=True)
         cur.execute(sql, params)
-        return [row_to_trade_record(r) for r in cur.fetchall()]
-    finally:
+    except Exception:
         cnx.close()
+        raise
+
+    def drain() -> Iterator[Tuple[Any, ...]]:
+        try:
+            yield from cur
+        finally:
+            cnx.close()
+
+    return drain()
+
+
+def fetch_trades(conn_params: Dict[str, Any], query: TradeQuery) -> Iterator[TradeRecord]:
+    rows = fetch_rows(conn_params, query)
+    return (row_to_trade_record(row) for row in rows)
 
 
 # ----------------------------
 # RAW SQL mode
 # ----------------------------
 
-def _strip_leading_comments(sql: str) -> str:
-    s = sql.lstrip()
-    # Remove leading /* ... */ blocks and -- line comments at top only
-    while s.startswith("/*"):
-        end = s.find("*/")
-        if end == -1:
-            break
-        s = s[end + 2 :].lstrip()
-    while s.startswith("--"):
-        nl = s.find("\n")
-        s = (s[nl + 1 :] if nl != -1 else "").lstrip()
-    return s
+# Leading whitespace, /* ... */ blocks and -- line comments, then SELECT;
+# matched in one linear scan without the intermediate slices the old
+# startswith/find loop allocated
+_SELECT_RE = re.compile(
+    r"\A(?:\s|/\*.*?\*/|--[^\n]*\n)*SELECT\b", re.DOTALL | re.IGNORECASE
+)
+# String/identifier literals ('' and \' escapes, double quotes, backticks);
+# blanked out before the stacked-statement scan so a ';' inside a literal
+# does not reject the query
+_QUOTED_RE = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`", re.DOTALL
+)
+# A ';' followed by anything non-whitespace means stacked statements
+_STACKED_RE = re.compile(r";\s*\S")
 
 
 def is_select_only(sql: str) -> bool:
-    s = _strip_leading_comments(sql)
-    return s[:6].lower() == "select"
+    if _STACKED_RE.search(_QUOTED_RE.sub("''", sql)):
+        return False
+    return _SELECT_RE.match(sql) is not None
 
 
-def fetch_trades_by_sql(conn_params: Dict[str, Any], sql: str) -> List[TradeRecord]:
+def fetch_rows_by_sql(conn_params: Dict[str, Any], sql: str) -> Iterator[Tuple[Any, ...]]:
+    # Validation and execute happen here, eagerly, so a rejected statement
+    # or missing column raises before the caller has touched its output file
     if not is_select_only(sql):
         raise ValueError("Chỉ cho phép lệnh SELECT trong --sql/--sql-file")
     cnx = mysql.connector.connect(**conn_params)
     try:
-        cur = cnx.cursor(dictionary=True)
+        cur = cnx.cursor(buffered=False)
         cur.execute(sql)
-        rows = cur.fetchall()
-        if not rows:
-            return []
-        cols = {desc[0] for desc in cur.description}  # type: ignore[index]
-        missing = REQUIRED_SET - cols
+        # description is available right after execute, before any row is read
+        colnames = [desc[0] for desc in cur.description]  # type: ignore[union-attr]
+        missing = REQUIRED_SET - set(colnames)
         if missing:
             raise ValueError(
                 "Thiếu cột bắt buộc trong kết quả SELECT: " + ", ".join(sorted(missing))
             )
-        return [row_to_trade_record(r) for r in rows]  # type: ignore[arg-type]
-    finally:
+        indices = [colnames.index(col) for col in COLUMNS]
+    except Exception:
         cnx.close()
+        raise
+
+    def drain() -> Iterator[Tuple[Any, ...]]:
+        try:
+            if indices == list(range(len(COLUMNS))) and len(colnames) == len(COLUMNS):
+                yield from cur
+            else:
+                # Reorder extra/shuffled columns into COLUMNS order
+                # (C-level getter)
+                reorder = itemgetter(*indices)
+                for row in cur:
+                    yield reorder(row)
+        finally:
+            cnx.close()
+
+    return drain()
+
+
+def fetch_trades_by_sql(conn_params: Dict[str, Any], sql: str) -> Iterator[TradeRecord]:
+    rows = fetch_rows_by_sql(conn_params, sql)
+    return (row_to_trade_record(row) for row in rows)
 
 
 # ----------------------------
 # Output helpers
 # ----------------------------
 
-def write_csv(path: str, records: List[TradeRecord]) -> None:
-    if not records:
+_DATETIME_FIELDS = ("open_time", "close_time", "expiration", "timestamp")
+
+_INT_FIELDS = ("id", "trade_account_id", "ticket", "digits", "type", "state", "magic")
+_STR_FIELDS = ("symbol_name", "comment")
+_FLOAT_FIELDS = tuple(
+    name
+    for name in TradeRecord.__annotations__
+    if name not in _INT_FIELDS + _STR_FIELDS + _DATETIME_FIELDS
+)
+
+# Rows per batch when streaming results into the bulk CSV writers
+_BATCH_ROWS = 10_000
+
+
+def _arrow_field_type(name: str) -> "pa.DataType":
+    if name in _DATETIME_FIELDS:
+        return pa.timestamp("us", tz="UTC")
+    if name in _INT_FIELDS:
+        return pa.int64()
+    if name in _STR_FIELDS:
+        return pa.string()
+    return pa.float64()
+
+
+def _arrow_float_strings(arr: "pa.Array") -> "pa.Array":
+    # Match str(float): integral values carry '.0' and exponents have at
+    # least two digits (Arrow renders 0.0 as '0' and 1e-07 as '1e-7')
+    s = pc.cast(arr, pa.string())
+    s = pc.replace_substring_regex(s, pattern=r"^(-?\d+)$", replacement=r"\1.0")
+    s = pc.replace_substring_regex(s, pattern=r"e\+(\d)$", replacement=r"e+0\1")
+    return pc.replace_substring_regex(s, pattern=r"e-(\d)$", replacement=r"e-0\1")
+
+
+def _iter_batches(items: Iterable[Any], size: int = _BATCH_ROWS) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def records_to_arrow(records: List[TradeRecord]) -> "pa.Table":
+    """Build a pyarrow Table columnwise from TradeRecords (SoA layout).
+
+    is_closed is derived with a single vectorized comparison instead of
+    evaluating the per-record property N times.
+    """
+    return TradeBatch.from_records(records).to_arrow()
+
+
+_EPOCH_SENTINELS = ("0", "19700101000000000")
+_BIGINT_HR_COLUMNS = ("OpenTime", "CloseTime", "Expiration", "TimeStamp")
+_COLUMN_RENAME = dict(zip(COLUMNS, TradeRecord.__annotations__))
+_OUTPUT_COLUMNS = list(TradeRecord.__annotations__) + ["is_closed"]
+
+# Per-field converters used by TradeBatch.from_rows (mirrors row_to_trade_record)
+_FIELD_CONVERTERS: Dict[str, Any] = {name: _opt_float for name in TradeRecord.__annotations__}
+_FIELD_CONVERTERS.update({name: _opt_int for name in _INT_FIELDS})
+_FIELD_CONVERTERS.update({name: _opt_str for name in _STR_FIELDS})
+_FIELD_CONVERTERS.update({name: bigint_hr_to_datetime for name in _DATETIME_FIELDS})
+_FIELD_CONVERTERS["id"] = int
+
+
+def rows_to_dataframe(rows: List[Tuple[Any, ...]]) -> "pd.DataFrame":
+    """Vectorized bulk conversion of raw result rows.
+
+    The four BigIntHumanReadable columns are parsed with one pd.to_datetime
+    call each instead of 4N bigint_hr_to_datetime calls, and is_closed is a
+    single column-wide comparison.
+    """
+    df = pd.DataFrame(rows, columns=list(COLUMNS))
+    for col in _BIGINT_HR_COLUMNS:
+        s = df[col].astype("string").str.strip()
+        present = s.notna() & (s != "") & ~s.isin(_EPOCH_SENTINELS)
+        # Reject malformed values loudly, exactly like bigint_hr_to_datetime:
+        # blanket zero-padding would silently turn e.g. a 15-digit value into
+        # a syntactically valid (and wrong) timestamp
+        bad = (present & ~s.str.fullmatch(r"\d{14}(\d{3})?")).fillna(False)
+        if bad.any():
+            raise ValueError(
+                f"Invalid BigIntHumanReadable value: {s[bad].iloc[0]}"
+            )
+        # Right-pad 14-digit values with zero milliseconds so one format fits
+        padded = s.where(present).str.pad(17, side="right", fillchar="0")
+        df[col] = pd.to_datetime(
+            padded, format="%Y%m%d%H%M%S%f", utc=True, errors="raise"
+        )
+    df = df.rename(columns=_COLUMN_RENAME)
+    # Same rendering as _opt_float: float columns print 0.0, not a raw 0
+    for col in _FLOAT_FIELDS:
+        df[col] = pd.to_numeric(df[col]).astype("float64")
+    df["is_closed"] = (
+        df["open_time"].notna()
+        & df["close_time"].notna()
+        & (df["close_time"] >= df["open_time"])
+    )
+    for col in _DATETIME_FIELDS:
+        # Same rendering as _iso: subseconds only when non-zero
+        df[col] = (
+            df[col]
+            .dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            .str.replace(r"\.000000Z$", "Z", regex=True)
+        )
+    return df
+
+
+def _iso(dt: Optional[datetime]) -> str:
+    return dt.isoformat().replace("+00:00", "Z") if dt is not None else ""
+
+
+def _trade_to_tuple(rec: TradeRecord) -> Tuple[Any, ...]:
+    # Pre-ordered tuple matching _OUTPUT_COLUMNS: no asdict deep copy and no
+    # per-field dict probes in DictWriter
+    return (
+        rec.id, rec.trade_account_id, rec.ticket, rec.symbol_name, rec.digits,
+        rec.type, rec.quantity, rec.state, _iso(rec.open_time), rec.open_price,
+        rec.open_rate, _iso(rec.close_time), rec.close_price, rec.close_rate,
+        rec.stop_loss, rec.take_profit, _iso(rec.expiration), rec.commission,
+        rec.commission_agent, rec.swap, rec.profit, rec.tax, rec.magic,
+        rec.comment, _iso(rec.timestamp), rec.is_closed,
+    )
+
+
+def _write_arrow_csv(path: str, tables: Iterable["pa.Table"]) -> None:
+    # Arrow's CSV writer cannot do minimal quoting (its "needed" style still
+    # quotes every string value), so the already-normalized string columns
+    # are drained columnwise and emitted through csv.writer - byte-identical
+    # to the stdlib fallback. The heavy lifting (datetime/float/bool
+    # rendering) stays in the vectorized Arrow kernels.
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(_OUTPUT_COLUMNS)
+        for table in tables:
+            w.writerows(zip(*(col.to_pylist() for col in table.columns)))
+
+
+def write_csv_from_rows(path: str, rows: Iterable[Tuple[Any, ...]]) -> None:
+    """Bulk CSV export that skips row_to_trade_record entirely: raw rows are
+    batched columnwise (DataFrame or SoA TradeBatch) and written through one
+    persistent handle."""
+    if pd is not None:
         with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=list(TradeRecord.__annotations__.keys()) + ["is_closed"])
-            writer.writeheader()
+            header = True
+            for batch in _iter_batches(rows):
+                rows_to_dataframe(batch).to_csv(
+                    f, index=False, header=header, lineterminator="\r\n"
+                )
+                header = False
+            if header:
+                # Empty result: still emit the header row
+                pd.DataFrame(columns=_OUTPUT_COLUMNS).to_csv(
+                    f, index=False, lineterminator="\r\n"
+                )
+        return
+    if pa is not None:
+        _write_arrow_csv(
+            path,
+            (TradeBatch.from_rows(batch).to_arrow() for batch in _iter_batches(rows)),
+        )
+        return
+    # Stdlib-only: still columnar - is_closed is precomputed per batch in one
+    # pass instead of N property dispatches, and rows go through csv.writer
+    field_names = list(TradeRecord.__annotations__)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(_OUTPUT_COLUMNS)
+        for batch in _iter_batches(rows):
+            tb = TradeBatch.from_rows(batch)
+            cols = [
+                [_iso(v) for v in tb.columns[name]]
+                if name in _DATETIME_FIELDS
+                else tb.columns[name]
+                for name in field_names
+            ]
+            cols.append(tb.is_closed_column())
+            w.writerows(zip(*cols))
+
+
+def write_csv(path: str, records: Iterable[TradeRecord]) -> None:
+    if pa is not None:
+        _write_arrow_csv(
+            path, (records_to_arrow(batch) for batch in _iter_batches(records))
+        )
         return
     with open(path, "w", newline="", encoding="utf-8") as f:
-        fieldnames = list(records[0].to_serializable().keys())
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+        w = csv.writer(f)
+        w.writerow(_OUTPUT_COLUMNS)
         for rec in records:
-            writer.writerow(rec.to_serializable())
+            w.writerow(_trade_to_tuple(rec))
+
+
+# Records per flush in write_jsonl: one stdout write (and usually one
+# syscall) per batch instead of one per record
+_JSONL_BATCH = 4096
 
 
-def write_jsonl(records: List[TradeRecord]) -> None:
+def write_jsonl(records: Iterable[TradeRecord]) -> None:
+    if orjson is not None:
+        def dumps(d: Dict[str, Any]) -> str:
+            return orjson.dumps(d).decode()
+    else:
+        def dumps(d: Dict[str, Any]) -> str:
+            return json.dumps(d, ensure_ascii=False)
+
+    w = sys.stdout.write
+    buf: List[str] = []
     for rec in records:
-        print(json.dumps(rec.to_serializable(), ensure_ascii=False))
+        buf.append(dumps(rec.to_serializable()))
+        if len(buf) >= _JSONL_BATCH:
+            w("\n".join(buf))
+            w("\n")
+            buf.clear()
+    if buf:
+        w("\n".join(buf))
+        w("\n")
 
 
 # ----------------------------
@@ -391,6 +753,18 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
     parser.add_argument("--closed-from", type=parse_iso8601_z)
     parser.add_argument("--closed-to", type=parse_iso8601_z)
     parser.add_argument("--comment-like")
+    parser.add_argument(
+        "--no-drop-magic-zero",
+        dest="drop_magic_zero",
+        action="store_false",
+        help="Giữ lại các dòng có Magic = 0 (mặc định sẽ loại bỏ)",
+    )
+    parser.add_argument(
+        "--no-drop-cancelled",
+        dest="drop_cancelled",
+        action="store_false",
+        help="Giữ lại các dòng có Comment 'cancelled'/'canceled' (mặc định sẽ loại bỏ)",
+    )
     parser.add_argument("--limit", type=int, default=100)
     parser.add_argument("--offset", type=int, default=0)
     parser.add_argument("--order-by", default="OpenTime")
@@ -420,7 +794,7 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
         sql_text = args.sql
 
     if sql_text:
-        records = fetch_trades_by_sql(conn_params, sql_text)
+        rows = fetch_rows_by_sql(conn_params, sql_text)
     else:
         query = TradeQuery(
             trade_account_id=args.account_id,
@@ -431,12 +805,24 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
             closed_from=args.closed_from,
             closed_to=args.closed_to,
             comment_like=args.comment_like,
+            drop_magic_zero=args.drop_magic_zero,
+            drop_cancelled=args.drop_cancelled,
             limit=args.limit,
             offset=args.offset,
             order_by=args.order_by,
             order_dir=args.order_dir,
         )
-        records = fetch_trades(conn_params, query)
+        rows = fetch_rows(conn_params, query)
+
+    if args.csv_out and not args.jsonl:
+        # CSV-only export: columnar bulk path, no per-row TradeRecords
+        write_csv_from_rows(args.csv_out, rows)
+        return
+
+    records: Iterable[TradeRecord] = (trade_record_from_tuple(r) for r in rows)
+    if (args.jsonl or not args.csv_out) and args.csv_out:
+        # Both outputs requested: the stream can only be consumed once
+        records = list(records)
 
     if args.jsonl or not args.csv_out:
         write_jsonl(records)